@@ -1,10 +1,17 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+import altair as alt
 import numpy as np
-from PIL import Image
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-import requests
+from types import MappingProxyType
+from typing import NamedTuple
+
+from indicadores_p1_2 import PARAMS, compute
 
 # --- Paleta de Colores ---
 # Definición de colores en formato RGB (0-1) para Matplotlib
@@ -20,8 +27,259 @@ color_sustrend_3_rgb = (0/255, 54/255, 110/255) # 00366E (Azul oscuro)
 # Selección de colores para los gráficos
 colors_for_charts = [color_primario_1_rgb, color_primario_2_rgb, color_sustrend_1_rgb, color_sustrend_3_rgb]
 
+# --- Constantes de los gráficos ---
+# Valores de línea base para los gráficos (desde los datos de la ficha P1.2)
+# Establecemos 0 como línea base para la "reducción" o "evitación" misma.
+_BASE_SORBATO = 0.0 # No hay reducción base sin la tecnología
+_BASE_PDA = 0.0 # No hay PDA evitado base sin la tecnología
+_BASE_PERDIDAS = 0.0 # No hay pérdidas económicas evitadas base sin la tecnología
+
+# Etiquetas, posiciones y colores de los gráficos de barras 2D
+_LABELS = ('Línea Base', 'Proyección')
+_X = np.arange(len(_LABELS))
+_BAR_WIDTH = 0.6
+_COLORS_SORBATO = (colors_for_charts[0], colors_for_charts[1])
+_COLORS_PDA = (colors_for_charts[2], colors_for_charts[3])
+_COLORS_PERDIDAS_ECO = (colors_for_charts[1], colors_for_charts[0])
+
+# Definición de cada gráfico: textos, colores, formato de las etiquetas (str.format para Matplotlib,
+# d3-format para Altair), mínimo del eje y y nombre del archivo descargable.
+class _ChartSpec(NamedTuple):
+    title: str
+    ylabel: str
+    ylabel_color: tuple
+    colors: tuple
+    fmt: str
+    vega_fmt: str
+    y_floor: float
+    filename: str
+
+_CHARTS = MappingProxyType({
+    'sorbato': _ChartSpec(
+        'Reducción Uso Sorbato de Potasio', 'Kilogramos/año', colors_for_charts[3], _COLORS_SORBATO,
+        '{:.2f}', '.2f', 1, 'Reduccion_Sorbato', # Asegura al menos 1kg si es muy bajo
+    ),
+    'pda': _ChartSpec(
+        'Pérdida y Desperdicio de Alimentos Evitado', 'Toneladas/año', colors_for_charts[0], _COLORS_PDA,
+        '{:.2f}', '.2f', 1, 'PDA_Evitado', # 15% de margen superior o mínimo 1 ton
+    ),
+    'perdidas_eco': _ChartSpec(
+        'Pérdidas Económicas Asociadas a PDA Evitada', 'USD/año', colors_for_charts[3], _COLORS_PERDIDAS_ECO,
+        '${:,.0f}', '$,.0f', 1000, 'Perdidas_Economicas_Evitadas_PDA', # 15% de margen superior o mínimo 1000 USD
+    ),
+})
+
+# Conversión de un color RGB (0-1) a hexadecimal, el formato que espera Altair/Vega-Lite
+def _to_hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*(round(c * 255) for c in rgb))
+
+# Colores de los gráficos ya convertidos a hexadecimal, indexados por su tupla RGB
+_HEX = MappingProxyType({rgb: _to_hex(rgb) for rgb in colors_for_charts})
+
+# Límite superior del eje y: 15% de margen sobre el valor máximo, con un mínimo por gráfico
+def _y_top(values, floor):
+    return max(max(values) * 1.15, floor)
+
+# Formatos de las métricas, como métodos format ya enlazados a su plantilla
+_FMT_KG = "{:.2f} kg".format
+_FMT_TON = "{:.2f} ton".format
+_FMT_TCO2E = "{:.2f} tCO₂e".format
+_FMT_USD = "USD {:,.2f}".format
+
+# --- Logos ---
+sustrend_logo_url = "https://drive.google.com/uc?id=1vx_znPU2VfdkzeDtl91dlpw_p9mmu4dd"
+ttgreenfoods_logo_url = "https://drive.google.com/uc?id=1uIQZQywjuQJz6Eokkj6dNSpBroJ8tQf8"
+
+# Directorio local donde se guardan los logos descargados, para que un reinicio del contenedor
+# no tenga que volver a pedirlos a Google Drive.
+_LOGOS_DIR = os.path.join(tempfile.gettempdir(), 'logos')
+
+# Ruta local del logo asociado a una URL
+def _logo_path(url):
+    return os.path.join(_LOGOS_DIR, f"{hashlib.sha1(url.encode()).hexdigest()}.png")
+
+# Decodifica un logo ya descargado (ruta en disco o BytesIO) y lo desacopla del archivo de origen
+def _decode_logo(source):
+    from PIL import Image
+
+    with Image.open(source) as img:
+        return img.copy()
+
+# Descarga y decodifica los logos una sola vez por proceso, en lugar de en cada rerun.
+# Primero se busca cada logo en disco; los que falten (o que en disco no se puedan decodificar) se
+# descargan en paralelo sobre una única sesión con un pool de dos conexiones (un solo viaje de ida
+# y vuelta a Google Drive en frío). Solo se guarda en disco una respuesta que sea una imagen válida,
+# para que una página HTML de Drive (cuota, aviso) no quede cacheada como logo.
+@st.cache_resource
+def _load_logos():
+    from PIL import Image
+
+    urls = (sustrend_logo_url, ttgreenfoods_logo_url)
+    logos = {}
+    for url in urls:
+        if os.path.exists(_logo_path(url)):
+            try:
+                logos[url] = _decode_logo(_logo_path(url))
+            except OSError:
+                # Archivo corrupto o que no es una imagen: se descarta y se vuelve a descargar
+                os.remove(_logo_path(url))
+
+    missing = [url for url in urls if url not in logos]
+    if missing:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        os.makedirs(_LOGOS_DIR, exist_ok=True)
+        with requests.Session() as session:
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=len(missing)))
+            with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+                responses = list(executor.map(lambda url: session.get(url, timeout=5), missing))
+        for url, response in zip(missing, responses):
+            response.raise_for_status()
+            # verify() falla si el cuerpo no es una imagen; en ese caso no se escribe nada en disco
+            with Image.open(BytesIO(response.content)) as img:
+                img.verify()
+            # Se escribe a un archivo temporal y se renombra, para no dejar un PNG a medias
+            tmp_path = f"{_logo_path(url)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(response.content)
+            os.replace(tmp_path, _logo_path(url))
+            logos[url] = _decode_logo(BytesIO(response.content))
+
+    # Los logos se muestran a 100 px de ancho: se reducen aquí (hasta 200 px para pantallas de alta
+    # densidad) para no enviar al navegador la imagen a resolución completa.
+    imgs = []
+    for url in urls:
+        logo = logos[url]
+        logo.thumbnail((200, 200), Image.LANCZOS)
+        imgs.append(logo)
+    return imgs
+
+# --- Funciones de visualización ---
+# Los gráficos en pantalla se envían como especificación Vega-Lite y los dibuja el navegador,
+# sin rasterizar en el servidor. Matplotlib queda solo para los PNG descargables.
+# Función auxiliar para construir un gráfico de barras con Altair
+def altair_bar_chart(chart_key, values, y_top):
+    spec = _CHARTS[chart_key]
+    data = alt.Data(values=[{'categoria': label, 'valor': value} for label, value in zip(_LABELS, values)])
+    base = alt.Chart(data).encode(
+        x=alt.X('categoria:N', sort=list(_LABELS), title=None,
+                axis=alt.Axis(labelAngle=-15, labelColor=_HEX[colors_for_charts[0]], ticks=False)),
+        y=alt.Y('valor:Q', title=spec.ylabel,
+                scale=alt.Scale(domain=[0, y_top]),
+                axis=alt.Axis(titleColor=_HEX[spec.ylabel_color], labelColor=_HEX[colors_for_charts[0]])),
+    )
+    bars = base.mark_bar(size=60).encode(
+        color=alt.Color('categoria:N', scale=alt.Scale(domain=list(_LABELS), range=[_HEX[c] for c in spec.colors]), legend=None),
+    )
+    text = base.mark_text(dy=-8, color=_HEX[colors_for_charts[0]]).encode(
+        text=alt.Text('valor:Q', format=spec.vega_fmt),
+    )
+    return (bars + text).properties(
+        title=alt.TitleParams(spec.title, color=_HEX[colors_for_charts[3]], fontSize=14),
+        height=400,
+    ).configure_view(strokeWidth=0)
+
+# Estilo común de los ejes de cada gráfico. Los spines superior y derecho ya se ocultan vía
+# rcParams en _init_matplotlib; set_xticks fija posiciones, etiquetas y su estilo en una sola llamada.
+def _style_ax(ax, ylabel, ylabel_color, title):
+    ax.set_ylabel(ylabel, fontsize=12, color=ylabel_color)
+    ax.set_title(title, fontsize=14, color=colors_for_charts[3], pad=20)
+    ax.set_xticks(_X, _LABELS, rotation=15, color=colors_for_charts[0])
+    ax.tick_params(axis='x', length=0)
+    ax.tick_params(axis='y', colors=colors_for_charts[0])
+
+# Dibuja un gráfico de barras con el estilo común y etiquetas de valor (ax.bar_label), y devuelve
+# las barras y las etiquetas para poder actualizarlas después.
+def _draw_bar(ax, values, colors, ylabel, ylabel_color, title, fmt):
+    bars = ax.bar(_X, values, width=_BAR_WIDTH, color=list(colors))
+    _style_ax(ax, ylabel, ylabel_color, title)
+    texts = ax.bar_label(bars, labels=[fmt.format(yval) for yval in values], padding=3, color=colors_for_charts[0])
+    return bars, texts
+
+# Configuración de Matplotlib: backend Agg explícito y modo no interactivo (sin sondear backends
+# GUI), simplificación máxima de trazos al rasterizar, fuente fija y estilo común de spines.
+# findfont deja resuelta la caché de fuentes antes del primer render.
+def _init_matplotlib():
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import font_manager
+
+    matplotlib.rcParams.update({
+        'interactive': False,
+        'path.simplify_threshold': 1.0,
+        'font.family': 'DejaVu Sans',
+        'axes.spines.top': False,
+        'axes.spines.right': False,
+    })
+    font_manager.findfont('DejaVu Sans')
+
+# La importación y configuración de Matplotlib se lanzan en un hilo de fondo, una sola vez por
+# proceso, al inicio del script: así ocurren mientras el usuario mira la página y no dentro del
+# primer clic de descarga. _download_figure espera a que el hilo termine (join es inmediato si ya
+# terminó).
+@st.cache_resource
+def _matplotlib_warmup():
+    thread = threading.Thread(target=_init_matplotlib, name='matplotlib-warmup', daemon=True)
+    thread.start()
+    return thread
+
+# Figura individual de descarga, construida una sola vez por proceso. Se usa
+# matplotlib.figure.Figure con un FigureCanvasAgg propio (sin estado global de pyplot); en cada
+# render solo se actualizan alturas, etiquetas y ylim. Los PNG se generan en el hilo de descarga
+# de Streamlit, por lo que cada figura lleva un lock para no mutarla desde dos descargas a la vez.
+@st.cache_resource
+def _download_figure(chart_key):
+    _matplotlib_warmup().join()
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    spec = _CHARTS[chart_key]
+    fig = Figure(figsize=(8, 6), dpi=120, facecolor=color_primario_3_rgb)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bars, texts = _draw_bar(ax, [0] * len(_LABELS), spec.colors, spec.ylabel, spec.ylabel_color, spec.title, spec.fmt)
+    # Márgenes fijos calculados una vez: dejan espacio para etiquetas del eje y de hasta 7 dígitos
+    fig.subplots_adjust(left=0.15, right=0.97, bottom=0.1, top=0.88)
+    return fig, canvas, ax, bars, texts, threading.Lock()
+
+# Genera el PNG de un gráfico individual, cacheado según los valores calculados para no
+# repetir el render si los parámetros no cambian. La caché se acota para que recorrer muchas
+# combinaciones de sliders no acumule PNGs sin límite en memoria.
+@st.cache_data(max_entries=32)
+def _render_png(chart_key, values, y_top):
+    spec = _CHARTS[chart_key]
+    fig, canvas, ax, bars, texts, lock = _download_figure(chart_key)
+    buf = BytesIO()
+    with lock:
+        for bar, yval in zip(bars, values):
+            bar.set_height(yval)
+        # Las etiquetas de bar_label quedan ancladas a la altura anterior, así que se reemplazan.
+        # Se pasan labels explícitos: con fmt, bar_label formatearía los datavalues con que se creó
+        # el contenedor de barras, que set_height no actualiza.
+        for text in texts:
+            text.remove()
+        texts[:] = ax.bar_label(bars, labels=[spec.fmt.format(yval) for yval in values], padding=3, color=colors_for_charts[0])
+        ax.set_ylim(bottom=0, top=y_top)
+
+        # Compresión zlib nivel 1: varias veces más rápida que la predeterminada (6), a cambio de un PNG algo mayor
+        canvas.print_png(buf, pil_kwargs={'compress_level': 1, 'optimize': False})
+    return buf.getvalue()
+
+# Función auxiliar para generar el botón de descarga. El PNG se genera de forma diferida:
+# Streamlit llama a `render` solo cuando el usuario hace clic, no en cada movimiento de slider.
+def download_button(render, filename_prefix, key):
+    st.download_button(
+        label=f"Descargar {filename_prefix}.png",
+        data=render,
+        file_name=f"{filename_prefix}.png",
+        mime="image/png",
+        key=key
+    )
+
 # --- Configuración de la página de Streamlit ---
 st.set_page_config(layout="wide")
+_matplotlib_warmup()
 
 st.title('✨ Visualizador de Impactos - Proyecto P1.2')
 st.subheader('Reducción del uso de sorbato de potasio en ciruelas deshidratadas mediante aspersión electrostática')
@@ -32,284 +290,122 @@ st.markdown("""
 
 # --- 1. Datos del Proyecto (Línea Base y Proyecciones) ---
 # Datos extraídos de la ficha técnica P1.2-2.docx
-# NOTA: Los valores "valor_base_ficha_ejemplo" se usan principalmente como referencia para una línea base en los gráficos.
 # Para este proyecto P1.2, donde el beneficio es una "reducción" o "evitación", la línea base para la "reducción"
 # o "evitación" misma es 0, y el valor proyectado es el impacto.
-data_p12 = {
-    "indicador": [
-        "Reducción en el uso de sorbato de potasio (kg/año)",
-        "GEI evitados por transporte de devoluciones (tCO₂e/año)",
-        "Ahorro en costos por sorbato de potasio (USD/año)",
-        "Pérdida y desperdicio de alimentos (PDA) evitado (ton/año)",
-        "Pérdidas económicas asociadas a la PDA evitada (USD/año)"
-    ],
-    "unidad": ["kg/año", "tCO₂e/año", "USD/año", "ton/año", "USD/año"],
-    # Para la reducción de sorbato, el "valor_base_ficha_ejemplo" es el que se obtenía con el método tradicional
-    # o un valor de referencia, aquí lo ajustamos para que la "Línea Base" del gráfico de *reducción* sea 0.
-    "valor_base_ficha_ejemplo": [
-        0,    # La reducción base sin la tecnología es 0. El beneficio es la proyección.
-        0,    # GEI evitados base es 0, el impacto es con la implementación
-        0,    # Ahorro base es 0, el impacto es con la implementación
-        0,    # PDA evitado base es 0, el beneficio es la proyección
-        0     # Pérdidas económicas evitadas base es 0, el beneficio es la proyección
-    ],
-    "produccion_anual_ejemplo_ton": [
-        1000, # Esto puede ser una referencia para cálculos internos si fuera necesario un factor de la ficha.
-        None,
-        1000,
-        None,
-        None
-    ],
-    "dosis_sorbato_conv_g_kg": [4, None, None, None, None], # 4 g/kg de ficha P1.2
-    "dosis_sorbato_opt_g_kg": [2.4, None, None, None, None], # 2.4 g/kg de ficha P1.2 (asumiendo 40% de reducción)
-    "precio_sorbato_usd_kg": [None, None, 5, None, None], # Precio estimado para sorbato
-    # Factores para GEI y precio de ciruela que NO estaban en las filas correctas o eran None
-    # Los asignamos directamente aquí para evitar None en los cálculos.
-    "distancia_transporte_km": [12000, 12000, None, None, None], # Asignamos a la fila 1 y 0 para consistencia
-    "factor_emision_co2e_ton_km": [0.01, 0.01, None, None, None], # Asignamos a la fila 1 y 0 para consistencia
-    "precio_ciruela_exportacion_usd_ton": [None, None, None, None, 3200], # Precio de ciruela de P1.2, en la fila de pérdidas económicas
-}
-
-df_diagnostico_p12 = pd.DataFrame(data_p12)
+# Los parámetros fijos de la ficha (PARAMS) y las fórmulas están en indicadores_p1_2.py.
 
 # --- 2. Widgets Interactivos para Parámetros (Streamlit) ---
 st.sidebar.header('Parámetros de Simulación')
 
-produccion_anual = st.sidebar.slider(
-    'Producción Anual de Ciruelas (ton):',
-    min_value=100,
-    max_value=5000,
-    value=2500, # Valor por defecto para un impacto inicial mayor
-    step=100,
-    help="Volumen total de ciruelas deshidratadas procesadas anualmente."
-)
-
-porcentaje_reduccion_sorbato = st.sidebar.slider(
-    'Reducción Sorbato (%):',
-    min_value=20.0,
-    max_value=60.0,
-    value=40.0, # Ajustado a 40% como el valor de la ficha para "dosis_sorbato_opt_g_kg"
-    step=1.0,
-    help="Porcentaje de reducción en el uso de sorbato de potasio aplicado."
-)
-
-porcentaje_devoluciones_evitadas = st.sidebar.slider(
-    'Reducción de PDA (Pérdida y Desperdicio de Alimentos) (% de producción anual):',
-    min_value=0.0,
-    max_value=5.0,
-    value=1.0,
-    step=0.1,
-    help="Porcentaje de la producción anual de ciruelas que se evita como PDA (desperdicio o devoluciones) gracias a la tecnología."
-)
-
-precio_ciruela = st.sidebar.slider(
-    'Precio Ciruela Exportación (USD/ton):',
-    min_value=2000,
-    max_value=5000,
-    value=3200,
-    step=100,
-    help="Precio promedio de exportación de la tonelada de ciruela."
-)
-
-# --- 3. Cálculos de Indicadores ---
-
-# Reducción sorbato (kg/año)
-dosis_conv_g_kg = df_diagnostico_p12.loc[0, 'dosis_sorbato_conv_g_kg']
-# Recalculamos la dosis óptima basada en el slider, no en el valor fijo del dataframe
-dosis_optim_g_kg_calculada = dosis_conv_g_kg * (1 - porcentaje_reduccion_sorbato / 100)
-reduccion_sorbato_kg_año = (dosis_conv_g_kg - dosis_optim_g_kg_calculada) * produccion_anual / 1000 # Convertir g/kg a kg/ton
-
-# Ahorro en costos por sorbato (USD/año)
-precio_sorbato = df_diagnostico_p12.loc[2, 'precio_sorbato_usd_kg'] # Aseguramos que la fila 2 tenga el precio
-ahorro_costos_sorbato_usd_año = reduccion_sorbato_kg_año * precio_sorbato
-
-# PDA evitado (ton/año)
-pda_evitada_ton_año = (porcentaje_devoluciones_evitadas / 100) * produccion_anual
-
-# GEI evitados por transporte (tCO₂e/año)
-# Usamos los valores asignados directamente en el diccionario data_p12 para evitar None
-distancia_transporte_km = df_diagnostico_p12.loc[1, 'distancia_transporte_km']
-factor_emision_co2e_ton_km = df_diagnostico_p12.loc[1, 'factor_emision_co2e_ton_km']
-gei_evitados_tco2e_año = pda_evitada_ton_año * (distancia_transporte_km * factor_emision_co2e_ton_km) # No dividir por 1000 si el factor ya está en tCO2e/ton-km
-
-# Pérdidas económicas asociadas a PDA evitada (USD/año)
-# Usamos el precio_ciruela del slider, no del dataframe para este cálculo directo
-perdidas_economicas_pda_evitada_usd_año = pda_evitada_ton_año * precio_ciruela
-
-st.header('Resultados Proyectados Anuales:')
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.metric(label="🧪 **Reducción en Uso de Sorbato**", value=f"{reduccion_sorbato_kg_año:.2f} kg")
-    st.caption("Menor cantidad de conservante químico utilizado.")
-with col2:
-    st.metric(label="💸 **Ahorro en Costos por Sorbato**", value=f"USD {ahorro_costos_sorbato_usd_año:,.2f}")
-    st.caption("Ahorro económico directo por la reducción en el uso de sorbato.")
-with col3:
-    st.metric(label="🗑️ **PDA Evitado**", value=f"{pda_evitada_ton_año:.2f} ton")
-    st.caption("Reducción de Pérdida y Desperdicio de Alimentos.")
-
-col4, col5 = st.columns(2)
-
-with col4:
-    st.metric(label="🌎 **GEI Evitados por Devoluciones**", value=f"{gei_evitados_tco2e_año:.2f} tCO₂e")
-    st.caption("Reducción de emisiones de gases de efecto invernadero por evitar transporte inverso de devoluciones.")
-with col5:
-    st.metric(label="💰 **Pérdidas Económicas Asociadas a PDA Evitada**", value=f"USD {perdidas_economicas_pda_evitada_usd_año:,.2f}")
-    st.caption("Ahorros económicos directos al evitar el desperdicio de ciruelas.")
+# Los sliders, los cálculos, los resultados y los gráficos forman un fragmento: mover un slider
+# (dibujado por el fragmento en la barra lateral) solo re-ejecuta esta función, no el encabezado,
+# los logos ni el pie de página.
+@st.fragment
+def render_results():
+    produccion_anual = st.sidebar.slider(
+        'Producción Anual de Ciruelas (ton):',
+        min_value=100,
+        max_value=5000,
+        value=2500, # Valor por defecto para un impacto inicial mayor
+        step=100,
+        help="Volumen total de ciruelas deshidratadas procesadas anualmente."
+    )
 
-st.markdown("---")
+    porcentaje_reduccion_sorbato = st.sidebar.slider(
+        'Reducción Sorbato (%):',
+        min_value=20,
+        max_value=60,
+        value=40, # Ajustado a 40% como el valor de la ficha para "dosis_sorbato_opt_g_kg"
+        step=1,
+        help="Porcentaje de reducción en el uso de sorbato de potasio aplicado."
+    )
 
-st.header('📊 Análisis Gráfico de Impactos')
+    porcentaje_devoluciones_evitadas = st.sidebar.slider(
+        'Reducción de PDA (Pérdida y Desperdicio de Alimentos) (% de producción anual):',
+        min_value=0.0,
+        max_value=5.0,
+        value=1.0,
+        step=0.1,
+        help="Porcentaje de la producción anual de ciruelas que se evita como PDA (desperdicio o devoluciones) gracias a la tecnología."
+    )
 
-# --- Visualización (Gráficos 2D con Matplotlib) ---
-# Cálculo de valores de línea base para los gráficos (desde los datos de la ficha P1.2)
-# Establecemos 0 como línea base para la "reducción" o "evitación" misma.
-reduccion_sorbato_base_ejemplo = 0 # No hay reducción base sin la tecnología
-pda_evitada_base_ejemplo = 0 # No hay PDA evitado base sin la tecnología
-perdidas_economicas_pda_base_ejemplo = 0 # No hay pérdidas económicas evitadas base sin la tecnología
-
-# Creamos una figura con 3 subplots (2D)
-fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(20, 7), facecolor=color_primario_3_rgb)
-fig.patch.set_facecolor(color_primario_3_rgb)
-
-# Definición de etiquetas y valores para los gráficos de barras 2D
-labels = ['Línea Base', 'Proyección']
-bar_width = 0.6
-x = np.arange(len(labels))
-
-# --- Gráfico 1: Reducción Sorbato (kg/año) ---
-sorbato_values = [reduccion_sorbato_base_ejemplo, reduccion_sorbato_kg_año]
-bars1 = ax1.bar(x, sorbato_values, width=bar_width, color=[colors_for_charts[0], colors_for_charts[1]])
-ax1.set_ylabel('Kilogramos/año', fontsize=12, color=colors_for_charts[3])
-ax1.set_title('Reducción Uso Sorbato de Potasio', fontsize=14, color=colors_for_charts[3], pad=20)
-ax1.set_xticks(x)
-ax1.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax1.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax1.spines['top'].set_visible(False)
-ax1.spines['right'].set_visible(False)
-ax1.tick_params(axis='x', length=0)
-# Ajuste dinámico del ylim
-max_sorbato_val = max(sorbato_values)
-ax1.set_ylim(bottom=0, top=max(max_sorbato_val * 1.15, 1)) # Asegura al menos 1kg si es muy bajo
-for bar in bars1:
-    yval = bar.get_height()
-    ax1.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, round(yval, 2), ha='center', va='bottom', color=colors_for_charts[0])
-
-# --- Gráfico 2: PDA Evitado (ton/año) ---
-pda_values = [pda_evitada_base_ejemplo, pda_evitada_ton_año]
-bars2 = ax2.bar(x, pda_values, width=bar_width, color=[colors_for_charts[2], colors_for_charts[3]])
-ax2.set_ylabel('Toneladas/año', fontsize=12, color=colors_for_charts[0])
-ax2.set_title('Pérdida y Desperdicio de Alimentos Evitado', fontsize=14, color=colors_for_charts[3], pad=20)
-ax2.set_xticks(x)
-ax2.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax2.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax2.spines['top'].set_visible(False)
-ax2.spines['right'].set_visible(False)
-ax2.tick_params(axis='x', length=0)
-# Ajuste dinámico del ylim
-max_pda_val = max(pda_values)
-ax2.set_ylim(bottom=0, top=max(max_pda_val * 1.15, 1)) # 15% de margen superior o mínimo 1 ton
-for bar in bars2:
-    yval = bar.get_height()
-    ax2.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, round(yval, 2), ha='center', va='bottom', color=colors_for_charts[0])
-
-# --- Gráfico 3: Pérdidas Económicas Evitadas (USD/año) ---
-perdidas_eco_values = [perdidas_economicas_pda_base_ejemplo, perdidas_economicas_pda_evitada_usd_año]
-bars3 = ax3.bar(x, perdidas_eco_values, width=bar_width, color=[colors_for_charts[1], colors_for_charts[0]])
-ax3.set_ylabel('USD/año', fontsize=12, color=colors_for_charts[3])
-ax3.set_title('Pérdidas Económicas Asociadas a PDA Evitada', fontsize=14, color=colors_for_charts[3], pad=20)
-ax3.set_xticks(x)
-ax3.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax3.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax3.spines['top'].set_visible(False)
-ax3.spines['right'].set_visible(False)
-ax3.tick_params(axis='x', length=0)
-# Ajuste dinámico del ylim
-max_perdidas_val = max(perdidas_eco_values)
-ax3.set_ylim(bottom=0, top=max(max_perdidas_val * 1.15, 1000)) # 15% de margen superior o mínimo 1000 USD
-for bar in bars3:
-    yval = bar.get_height()
-    ax3.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, f"${yval:,.0f}", ha='center', va='bottom', color=colors_for_charts[0])
-
-plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-st.pyplot(fig)
-
-# --- Funcionalidad de descarga de cada gráfico ---
-st.markdown("---")
-st.subheader("Descargar Gráficos Individualmente")
+    precio_ciruela = st.sidebar.slider(
+        'Precio Ciruela Exportación (USD/ton):',
+        min_value=2000,
+        max_value=5000,
+        value=PARAMS['precio_ciruela_usd_ton'],
+        step=100,
+        help="Precio promedio de exportación de la tonelada de ciruela."
+    )
 
-# Función auxiliar para generar el botón de descarga
-def download_button(fig, filename_prefix, key):
-    buf = BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", dpi=300)
-    st.download_button(
-        label=f"Descargar {filename_prefix}.png",
-        data=buf.getvalue(),
-        file_name=f"{filename_prefix}.png",
-        mime="image/png",
-        key=key
+    # --- 3. Cálculos de Indicadores ---
+    # Los sliders son discretos, así que sus valores sirven directamente como claves de caché. El de
+    # devoluciones se redondea a su paso (0.1) para que errores de coma flotante del frontend
+    # (p. ej. 2.3000000000000003) no generen claves distintas para el mismo valor.
+    (
+        reduccion_sorbato_kg_año,
+        ahorro_costos_sorbato_usd_año,
+        pda_evitada_ton_año,
+        gei_evitados_tco2e_año,
+        perdidas_economicas_pda_evitada_usd_año,
+    ) = compute(produccion_anual, porcentaje_reduccion_sorbato, round(porcentaje_devoluciones_evitadas, 1), precio_ciruela)
+
+    st.header('Resultados Proyectados Anuales:')
+
+    # Métricas por fila (etiqueta, valor, descripción): tres en la primera y dos en la segunda. Se
+    # escriben dentro de un único contenedor recorriendo las columnas de cada fila.
+    metric_rows = (
+        (
+            ("🧪 **Reducción en Uso de Sorbato**", _FMT_KG(reduccion_sorbato_kg_año),
+             "Menor cantidad de conservante químico utilizado."),
+            ("💸 **Ahorro en Costos por Sorbato**", _FMT_USD(ahorro_costos_sorbato_usd_año),
+             "Ahorro económico directo por la reducción en el uso de sorbato."),
+            ("🗑️ **PDA Evitado**", _FMT_TON(pda_evitada_ton_año),
+             "Reducción de Pérdida y Desperdicio de Alimentos."),
+        ),
+        (
+            ("🌎 **GEI Evitados por Devoluciones**", _FMT_TCO2E(gei_evitados_tco2e_año),
+             "Reducción de emisiones de gases de efecto invernadero por evitar transporte inverso de devoluciones."),
+            ("💰 **Pérdidas Económicas Asociadas a PDA Evitada**", _FMT_USD(perdidas_economicas_pda_evitada_usd_año),
+             "Ahorros económicos directos al evitar el desperdicio de ciruelas."),
+        ),
     )
 
-# Crear figuras individuales para cada gráfico para poder descargarlas
-# Figura 1: Reducción Sorbato
-fig_sorbato, ax_sorbato = plt.subplots(figsize=(8, 6), facecolor=color_primario_3_rgb)
-ax_sorbato.bar(x, sorbato_values, width=bar_width, color=[colors_for_charts[0], colors_for_charts[1]])
-ax_sorbato.set_ylabel('Kilogramos/año', fontsize=12, color=colors_for_charts[3])
-ax_sorbato.set_title('Reducción Uso Sorbato de Potasio', fontsize=14, color=colors_for_charts[3], pad=20)
-ax_sorbato.set_xticks(x)
-ax_sorbato.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax_sorbato.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax_sorbato.spines['top'].set_visible(False)
-ax_sorbato.spines['right'].set_visible(False)
-ax_sorbato.tick_params(axis='x', length=0)
-ax_sorbato.set_ylim(bottom=0, top=max(max_sorbato_val * 1.15, 1))
-for bar in ax_sorbato.patches:
-    yval = bar.get_height()
-    ax_sorbato.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, round(yval, 2), ha='center', va='bottom', color=colors_for_charts[0])
-plt.tight_layout()
-download_button(fig_sorbato, "Reduccion_Sorbato", "download_sorbato")
-plt.close(fig_sorbato)
-
-# Figura 2: PDA Evitado
-fig_pda, ax_pda = plt.subplots(figsize=(8, 6), facecolor=color_primario_3_rgb)
-ax_pda.bar(x, pda_values, width=bar_width, color=[colors_for_charts[2], colors_for_charts[3]])
-ax_pda.set_ylabel('Toneladas/año', fontsize=12, color=colors_for_charts[0])
-ax_pda.set_title('Pérdida y Desperdicio de Alimentos Evitado', fontsize=14, color=colors_for_charts[3], pad=20)
-ax_pda.set_xticks(x)
-ax_pda.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax_pda.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax_pda.spines['top'].set_visible(False)
-ax_pda.spines['right'].set_visible(False)
-ax_pda.tick_params(axis='x', length=0)
-ax_pda.set_ylim(bottom=0, top=max(max_pda_val * 1.15, 1))
-for bar in ax_pda.patches:
-    yval = bar.get_height()
-    ax_pda.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, round(yval, 2), ha='center', va='bottom', color=colors_for_charts[0])
-plt.tight_layout()
-download_button(fig_pda, "PDA_Evitado", "download_pda")
-plt.close(fig_pda)
-
-# Figura 3: Pérdidas Económicas Evitadas
-fig_perdidas_eco, ax_perdidas_eco = plt.subplots(figsize=(8, 6), facecolor=color_primario_3_rgb)
-ax_perdidas_eco.bar(x, perdidas_eco_values, width=bar_width, color=[colors_for_charts[1], colors_for_charts[0]])
-ax_perdidas_eco.set_ylabel('USD/año', fontsize=12, color=colors_for_charts[3])
-ax_perdidas_eco.set_title('Pérdidas Económicas Asociadas a PDA Evitada', fontsize=14, color=colors_for_charts[3], pad=20)
-ax_perdidas_eco.set_xticks(x)
-ax_perdidas_eco.set_xticklabels(labels, rotation=15, color=colors_for_charts[0])
-ax_perdidas_eco.yaxis.set_tick_params(colors=colors_for_charts[0])
-ax_perdidas_eco.spines['top'].set_visible(False)
-ax_perdidas_eco.spines['right'].set_visible(False)
-ax_perdidas_eco.tick_params(axis='x', length=0)
-ax_perdidas_eco.set_ylim(bottom=0, top=max(max_perdidas_val * 1.15, 1000))
-for bar in ax_perdidas_eco.patches:
-    yval = bar.get_height()
-    ax_perdidas_eco.text(bar.get_x() + bar.get_width()/2, yval + 0.05 * yval, f"${yval:,.0f}", ha='center', va='bottom', color=colors_for_charts[0])
-plt.tight_layout()
-download_button(fig_perdidas_eco, "Perdidas_Economicas_Evitadas_PDA", "download_perdidas_eco")
-plt.close(fig_perdidas_eco)
+    with st.container():
+        for row in metric_rows:
+            for col, (label, value, caption) in zip(st.columns(len(row)), row):
+                col.metric(label=label, value=value)
+                col.caption(caption)
+
+    st.markdown("---")
 
+    st.header('📊 Análisis Gráfico de Impactos')
+
+    # --- Visualización (Gráficos 2D con Altair) ---
+    # Valores de cada gráfico (línea base y proyección), en el mismo orden que _CHARTS
+    chart_values = {
+        'sorbato': (_BASE_SORBATO, reduccion_sorbato_kg_año), # Reducción Sorbato (kg/año)
+        'pda': (_BASE_PDA, pda_evitada_ton_año), # PDA Evitado (ton/año)
+        'perdidas_eco': (_BASE_PERDIDAS, perdidas_economicas_pda_evitada_usd_año), # Pérdidas Económicas Evitadas (USD/año)
+    }
+    # Límite superior del eje y de cada gráfico, compartido por el gráfico en pantalla y el descargable
+    chart_y_tops = {chart_key: _y_top(values, _CHARTS[chart_key].y_floor) for chart_key, values in chart_values.items()}
+
+    for col_graf, (chart_key, values) in zip(st.columns(len(chart_values)), chart_values.items()):
+        with col_graf:
+            st.altair_chart(altair_bar_chart(chart_key, values, chart_y_tops[chart_key]), width="stretch")
+
+    # --- Funcionalidad de descarga de cada gráfico ---
+    st.markdown("---")
+    st.subheader("Descargar Gráficos Individualmente")
+
+    for chart_key, values in chart_values.items():
+        download_button(
+            functools.partial(_render_png, chart_key, values, chart_y_tops[chart_key]),
+            _CHARTS[chart_key].filename, f"download_{chart_key}"
+        )
+
+render_results()
 
 st.markdown("---")
 st.markdown("### Información Adicional:")
@@ -327,23 +423,16 @@ st.markdown("<br>", unsafe_allow_html=True)
 col_logos_left, col_logos_center, col_logos_right = st.columns([1, 2, 1])
 
 with col_logos_center:
-    sustrend_logo_url = "https://drive.google.com/uc?id=1vx_znPU2VfdkzeDtl91dlpw_p9mmu4dd"
-    ttgreenfoods_logo_url = "https://drive.google.com/uc?id=1uIQZQywjuQJz6Eokkj6dNSpBroJ8tQf8"
-
     try:
-        sustrend_response = requests.get(sustrend_logo_url)
-        sustrend_response.raise_for_status()
-        sustrend_image = Image.open(BytesIO(sustrend_response.content))
-
-        ttgreenfoods_response = requests.get(ttgreenfoods_logo_url)
-        ttgreenfoods_response.raise_for_status()
-        ttgreenfoods_image = Image.open(BytesIO(ttgreenfoods_response.content))
-
+        sustrend_image, ttgreenfoods_image = _load_logos()
         st.image([sustrend_image, ttgreenfoods_image], width=100)
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error al cargar los logos desde las URLs. Por favor, verifica los enlaces: {e}")
     except Exception as e:
-        st.error(f"Error inesperado al procesar las imágenes de los logos: {e}")
+        # requests solo se importa cuando se necesita, igual que en _load_logos
+        from requests.exceptions import RequestException
+        if isinstance(e, RequestException):
+            st.error(f"Error al cargar los logos desde las URLs. Por favor, verifica los enlaces: {e}")
+        else:
+            st.error(f"Error inesperado al procesar las imágenes de los logos: {e}")
 
 st.markdown("<div style='text-align: center; font-size: small; color: gray;'>Viña del Mar, Valparaíso, Chile</div>", unsafe_allow_html=True)
 
@@ -0,0 +1,49 @@
+import functools
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+
+# --- Cálculo de indicadores del Proyecto P1.2 ---
+# Este módulo se importa una sola vez por proceso (Streamlit solo re-ejecuta el script principal
+# en cada rerun), por lo que la caché de compute se conserva entre reruns y entre sesiones.
+
+# Parámetros fijos de la ficha técnica P1.2-2.docx usados en los cálculos, como escalares de solo lectura.
+PARAMS = MappingProxyType({
+    'dosis_conv_g_kg': 4.0,          # 4 g/kg de ficha P1.2 (dosis convencional de sorbato)
+    'precio_sorbato_usd_kg': 5.0,    # Precio estimado para sorbato
+    'dist_km': 12000.0,              # Distancia de transporte de las devoluciones
+    'factor_emis': 0.01,             # Factor de emisión (tCO₂e/ton-km)
+    'precio_ciruela_usd_ton': 3200,  # Precio de ciruela de exportación de P1.2 (valor por defecto del slider)
+})
+
+class Indicadores(NamedTuple):
+    reduccion_sorbato_kg_año: float
+    ahorro_costos_sorbato_usd_año: float
+    pda_evitada_ton_año: float
+    gei_evitados_tco2e_año: float
+    perdidas_economicas_pda_evitada_usd_año: float
+
+# Cada indicador se expresa como produccion_anual * factor_slider * coeficiente, con los factores
+# (pct_red, pct_red, pct_dev, pct_dev, pct_dev * precio) en el mismo orden que Indicadores.
+COEFS = np.array([
+    PARAMS['dosis_conv_g_kg'] / 100 / 1000,                                    # Reducción sorbato (kg/año); g/kg a kg/ton
+    PARAMS['dosis_conv_g_kg'] / 100 / 1000 * PARAMS['precio_sorbato_usd_kg'],  # Ahorro en costos por sorbato (USD/año)
+    1 / 100,                                                                   # PDA evitado (ton/año)
+    PARAMS['dist_km'] * PARAMS['factor_emis'] / 100,                           # GEI evitados por transporte (tCO₂e/año)
+    1 / 100,                                                                   # Pérdidas económicas por PDA evitada (USD/año)
+])
+
+# Núcleo vectorizado: recibe (produccion_anual, pct_red, pct_dev, precio) en el último eje, por lo que
+# también acepta lotes de forma (N, 4) para barridos de sensibilidad sin bucles.
+def kernel(params):
+    produccion, pct_red, pct_dev, precio = np.moveaxis(np.asarray(params, dtype=float), -1, 0)
+    factores = np.stack([pct_red, pct_red, pct_dev, pct_dev, pct_dev * precio], axis=-1)
+    return produccion[..., None] * factores * COEFS
+
+# Los indicadores son funciones puras de los cuatro sliders; se memoizan para que volver a una
+# combinación ya visitada (al arrastrar un slider de ida y vuelta) sea una búsqueda en un dict.
+# Las claves son discretas: pct_red es entero y pct_dev llega redondeado a su paso de 0.1.
+@functools.lru_cache(maxsize=1024)
+def compute(produccion_anual: int, pct_red: int, pct_dev: float, precio: int) -> Indicadores:
+    return Indicadores(*kernel((produccion_anual, pct_red, pct_dev, precio)).tolist())